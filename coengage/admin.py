@@ -8,6 +8,7 @@ from .models import (
     CustomUser,
     Group,
     Image,
+    OTPState,
     Post,
     PostVote,
     Tag,
@@ -115,6 +116,11 @@ class GroupAdmin(admin.ModelAdmin):
     fields = ["name", "description", "users"]
 
 
+class OTPStateAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "expires_at", "attempts", "attempts_started_at")
+    fields = ["user", "otp", "expires_at", "attempts", "attempts_started_at"]
+
+
 class PostVoteAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "post", "vote")
     fields = ["user", "post", "vote"]
@@ -132,5 +138,6 @@ admin.site.register(Post, PostAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Image, ImageAdmin)
 admin.site.register(Group, GroupAdmin)
+admin.site.register(OTPState, OTPStateAdmin)
 admin.site.register(PostVote, PostVoteAdmin)
 admin.site.register(CommentVote, CommentVoteAdmin)
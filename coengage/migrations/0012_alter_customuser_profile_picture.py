@@ -0,0 +1,18 @@
+# Generated by Django 4.2.3 on 2026-08-31 11:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coengage', '0011_comment_slug'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='profile_picture',
+            field=models.CharField(default='https://hackersclub-production-user-content-us-west-1.s3.us-west-1.amazonaws.com/default_profile_picture.png', max_length=255),
+        ),
+    ]
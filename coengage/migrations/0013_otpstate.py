@@ -0,0 +1,27 @@
+# Generated by Django 4.2.3 on 2026-08-31 11:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coengage', '0012_alter_customuser_profile_picture'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OTPState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('otp', models.CharField(max_length=32)),
+                ('expires_at', models.DateTimeField()),
+                ('attempts', models.IntegerField(default=0)),
+                ('attempts_started_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='otp_state', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -1,7 +1,9 @@
 from datetime import datetime
 
 from django.contrib.auth.models import AbstractUser
+from django.core.files.storage import default_storage
 from django.db import DatabaseError, models
+from django.utils.functional import cached_property
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 
@@ -17,8 +19,11 @@ class CustomUser(AbstractUser):
         (STUDENT, "Student"),
     )
     email = models.EmailField(unique=True)
-    profile_picture = models.URLField(
-        default="https://hackersclub-production-user-content-us-west-1.s3.us-west-1.amazonaws.com/default_profile_picture.png"
+    # Holds the S3 key of the uploaded picture; older rows (and the default)
+    # hold an absolute URL, which profile_picture_url passes through as-is
+    profile_picture = models.CharField(
+        max_length=255,
+        default="https://hackersclub-production-user-content-us-west-1.s3.us-west-1.amazonaws.com/default_profile_picture.png",
     )
     role = models.PositiveSmallIntegerField(choices=ROLE_CHOICES, default=STUDENT)
     bio = models.TextField(_("about"), max_length=500, blank=True)
@@ -32,12 +37,35 @@ class CustomUser(AbstractUser):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username"]
 
+    @cached_property
+    def profile_picture_url(self):
+        if not self.profile_picture or self.profile_picture.startswith("http"):
+            return self.profile_picture
+        return default_storage.url(self.profile_picture)
+
     def save(self, *args, **kwargs):
         # Convert username to lowercase and remove spaces
         self.username = self.username.lower().replace(" ", "_")
         super(CustomUser, self).save(*args, **kwargs)
 
 
+class OTPState(models.Model):
+    # Email-verification OTP state, kept off the wide CustomUser row so the
+    # write-heavy verify/resend flow hits a narrow table with a single PK
+    # index. Password-reset OTPs still use the CustomUser columns
+    user = models.OneToOneField(
+        CustomUser, on_delete=models.CASCADE, related_name="otp_state"
+    )
+    otp = models.CharField(max_length=32)
+    expires_at = models.DateTimeField()
+    attempts = models.IntegerField(default=0)
+    attempts_started_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"OTP state for {self.user_id}"
+
+
 class TimeStampedModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
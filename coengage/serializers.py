@@ -1,15 +1,16 @@
-from datetime import timedelta
-
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
 from django.db import DatabaseError
-from django.utils import timezone
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 from coengage.models import Category, Comment, CommentVote, Image, Post, PostVote, Tag
 
-from .utilities import generate_otp, normalize_name
+from .utilities import (
+    handle_user_profile_picture_upload,
+    normalize_name,
+    validate_image_file,
+)
 
 User = get_user_model()
 
@@ -36,13 +37,8 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         return data
 
 
-class URLImageField(serializers.ImageField):
-    def to_representation(self, value):
-        return value
-
-
 class UserSerializer(serializers.ModelSerializer):
-    profile_picture = URLImageField(use_url=True, required=False)
+    profile_picture = serializers.ReadOnlyField(source="profile_picture_url")
     email = serializers.EmailField(read_only=True)
 
     def validate_email(self, value):
@@ -59,6 +55,20 @@ class UserSerializer(serializers.ModelSerializer):
                 {"message": "An unexpected error occurred during email validation."}
             )
 
+    def update(self, instance, validated_data):
+        # Upload any new picture first and fold the resulting S3 key into
+        # validated_data, so the whole PATCH lands in a single UPDATE
+        if profile_picture_file := validated_data.pop("profile_picture_file", None):
+            if error := validate_image_file(profile_picture_file):
+                raise serializers.ValidationError({"message": error})
+            s3_key = handle_user_profile_picture_upload(instance, profile_picture_file)
+            if s3_key is None:
+                raise serializers.ValidationError(
+                    {"message": "Error uploading profile picture."}
+                )
+            validated_data["profile_picture"] = s3_key
+        return super().update(instance, validated_data)
+
     class Meta:
         model = User
         fields = ["username", "id", "email", "bio", "profile_picture"]
@@ -74,11 +84,8 @@ class RegisterSerializer(UserSerializer):
     def create(self, validated_data):
         try:
             validated_data["password"] = make_password(validated_data.get("password"))
-            validated_data["otp"] = generate_otp()
-            validated_data["otp_created_at"] = timezone.now()
-            validated_data["otp_expiration"] = timezone.now() + timedelta(minutes=10)
-            validated_data["otp_attempts"] = 0
-            validated_data["otp_attempts_timestamp"] = None
+            # The verification OTP lives in OTPState; RegisterView creates it
+            # after the user row is saved
             return super().create(validated_data)
         except DatabaseError:
             print("Database error during user registration.")
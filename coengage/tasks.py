@@ -0,0 +1,47 @@
+from celery import group, shared_task
+
+from .utilities import send_email_sendgrid, send_email_sendgrid_bulk
+
+# Recipients packed into one provider API call per task
+OTP_EMAIL_CHUNK_SIZE = 50
+
+
+@shared_task(bind=True, max_retries=5)
+def send_otp_email(self, username, otp, email):
+    email_response = send_email_sendgrid(username, otp, email)
+    if not email_response["success"]:
+        # retry_backoff only applies to autoretry_for; manual retries need
+        # an explicit exponential countdown (1s, 2s, 4s, ...)
+        raise self.retry(
+            exc=Exception(email_response["message"]),
+            countdown=2**self.request.retries,
+        )
+    return email_response
+
+
+@shared_task(bind=True, max_retries=5)
+def send_otp_email_chunk(self, recipients):
+    email_response = send_email_sendgrid_bulk(recipients)
+    if not email_response["success"]:
+        # retry_backoff only applies to autoretry_for; manual retries need
+        # an explicit exponential countdown (1s, 2s, 4s, ...)
+        raise self.retry(
+            exc=Exception(email_response["message"]),
+            countdown=2**self.request.retries,
+        )
+    return email_response
+
+
+def send_otp_emails_bulk(recipients):
+    # Shard the recipients into chunks and let the workers send them in
+    # parallel, one API call per chunk instead of one per recipient.
+    # recipients is an iterable of (username, otp, email) tuples, same as
+    # send_email_sendgrid_bulk: callers supply the code explicitly because
+    # the email-verification OTP lives in OTPState, not on CustomUser.otp
+    # (which only carries password-reset codes)
+    recipients = list(recipients)
+    chunks = [
+        recipients[i : i + OTP_EMAIL_CHUNK_SIZE]
+        for i in range(0, len(recipients), OTP_EMAIL_CHUNK_SIZE)
+    ]
+    return group(send_otp_email_chunk.s(chunk) for chunk in chunks).apply_async()
@@ -1,23 +1,48 @@
 import os
-import random
+import secrets
+from functools import lru_cache
 
 import boto3
-from botocore.exceptions import BotoCoreError, ClientError
+from boto3.s3.transfer import TransferConfig
 from django.conf import settings
-from django.core.files.storage import default_storage
 from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
+from sendgrid.helpers.mail import Mail, Personalization, To
 
 from coengage.models import Comment, Image, Post
 
 
+ALLOWED_IMG_EXT = frozenset({".jpg", ".jpeg", ".png", ".webp"})
+MAX_IMG_BYTES = 5 * 1024 * 1024
+
+
+def validate_image_file(file):
+    # Returns an error message, or None if the file is acceptable. Called
+    # before any S3 work so bad uploads are rejected without a PUT
+    ext = os.path.splitext(file.name)[1].lower()
+    if ext not in ALLOWED_IMG_EXT:
+        return "Only .jpg, .jpeg, .png and .webp images are allowed"
+    if file.size > MAX_IMG_BYTES:
+        return "Image must be 5 MB or smaller"
+    return None
+
+
 def generate_otp():
-    return str(random.randint(100000, 999999))
+    # secrets uses the OS CSPRNG; random.randint is predictable and unsafe
+    # for auth codes
+    return f"{secrets.randbelow(900_000) + 100_000:06d}"
 
 
 def normalize_name(name):
     return name.strip().lower()
 
+
+@lru_cache(maxsize=1)
+def get_sendgrid_client():
+    # Reuse one client (and its underlying HTTP session) per process instead
+    # of building a new one for every email
+    return SendGridAPIClient(settings.SENDGRID_API_KEY)
+
+
 def send_email_sendgrid(username, otp, email):
     try:
         # Set up data for dynamic template
@@ -32,7 +57,7 @@ def send_email_sendgrid(username, otp, email):
         message.dynamic_template_data = data
 
         # Send the email using SendGrid
-        sg = SendGridAPIClient(settings.SENDGRID_API_KEY)
+        sg = get_sendgrid_client()
         response = sg.send(message)
         return {"success": True, "message": "Email sent successfully"}
 
@@ -40,13 +65,65 @@ def send_email_sendgrid(username, otp, email):
         print(f"Error sending email with SendGrid: {str(e)}")
         return {"success": False, "message": str(e)}
 
-    
+
+def send_email_sendgrid_bulk(recipients):
+    # Send the OTP template to many recipients in one API call instead of N.
+    # recipients is an iterable of (username, otp, email) tuples; only the
+    # small per-recipient template data goes over the wire, SendGrid renders
+    # the template server-side
+    try:
+        message = Mail(from_email=settings.SENDGRID_EMAIL_SOURCE)
+        message.template_id = settings.SENDGRID_TEMPLATE_ID
+        for username, otp, email in recipients:
+            personalization = Personalization()
+            personalization.add_to(To(email))
+            personalization.dynamic_template_data = {"name": username, "otp": otp}
+            message.add_personalization(personalization)
+
+        sg = get_sendgrid_client()
+        sg.send(message)
+        return {"success": True, "message": "Email sent successfully"}
+
+    except Exception as e:
+        print(f"Error sending bulk email with SendGrid: {str(e)}")
+        return {"success": False, "message": str(e)}
+
+
+# Single PUT for small files, concurrent part uploads above the threshold
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=5 * 1024 * 1024,
+    multipart_chunksize=5 * 1024 * 1024,
+    max_concurrency=4,
+    use_threads=True,
+)
+
+
+@lru_cache(maxsize=1)
+def get_s3_client():
+    return boto3.client(
+        "s3",
+        region_name=settings.AWS_S3_REGION_NAME,
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+    )
 
 
 def save_file_to_s3(file, s3_path):
     try:
-        default_storage.save(s3_path, file)
-        return default_storage.url(s3_path)
+        # Same key layout and URL default_storage produced, but streamed
+        # through upload_fileobj instead of buffered by the storage backend
+        key = f"{settings.AWS_LOCATION}/{s3_path}"
+        extra_args = dict(settings.AWS_S3_OBJECT_PARAMETERS)
+        if getattr(file, "content_type", None):
+            extra_args["ContentType"] = file.content_type
+        get_s3_client().upload_fileobj(
+            file,
+            settings.AWS_STORAGE_BUCKET_NAME,
+            key,
+            Config=S3_TRANSFER_CONFIG,
+            ExtraArgs=extra_args,
+        )
+        return f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{key}"
     except Exception as e:
         print(f"Error saving file to S3: {str(e)}")
         return None
@@ -56,7 +133,10 @@ def handle_user_profile_picture_upload(user, file):
     try:
         _, file_extension = os.path.splitext(file.name)
         s3_path = f"users/{user.id}/profile_picture{file_extension}"
-        return save_file_to_s3(file, s3_path)
+        if save_file_to_s3(file, s3_path) is None:
+            return None
+        # Store the key; CustomUser.profile_picture_url derives the URL
+        return s3_path
     except Exception as e:
         print(f"Error handling user profile picture upload: {str(e)}")
         return None
@@ -1,8 +1,10 @@
+import hmac
 from datetime import timedelta
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db import DatabaseError, transaction
-from django.db.models import Count
+from django.db.models import Case, Count, F, Value, When
 from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
@@ -14,7 +16,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
-from .models import Category, Comment, CommentVote, Post, PostVote, Tag
+from .models import Category, Comment, CommentVote, OTPState, Post, PostVote, Tag
 from .serializers import (
     CategorySerializer,
     ChangePasswordSerializer,
@@ -30,15 +32,23 @@ from .serializers import (
     UserSerializer,
     VerifyEmailSerializer,
 )
-from .utilities import (
-    generate_otp,
-    handle_and_save_images,
-    handle_user_profile_picture_upload,
-    send_email_sendgrid,
-)
+from .tasks import send_otp_email
+from .utilities import generate_otp, handle_and_save_images, send_email_sendgrid
 
 User = get_user_model()
 
+# OTP state mirrored into the cache at send time so verification attempts
+# (especially brute-force storms of wrong guesses) stay off Postgres. The TTL
+# matches the 10-minute OTP expiry, so an expired cache entry and an expired
+# OTP are the same thing
+OTP_CACHE_TTL = 600
+OTP_MAX_ATTEMPTS = 3
+
+
+def cache_otp(email, otp):
+    cache.set(f"otp:{email}", otp, timeout=OTP_CACHE_TTL)
+    cache.delete(f"otp_attempts:{email}")
+
 
 class IsUserOwnerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
@@ -59,6 +69,18 @@ class IsPostOrCommentOwnerOrAdmin(permissions.BasePermission):
         return obj.user == request.user or request.user.role == User.ADMIN
 
 
+# Per-action permission overrides for UserViewSet; actions not listed fall
+# back to the class default
+USER_PERMS_BY_ACTION = {"destroy": [IsUserOwnerOrAdmin]}
+
+# Relations read by UserSerializer. It currently serializes only local
+# columns, so both are empty; add FK fields to the first and M2M/reverse-FK
+# fields to the second as soon as the serializer grows one, and user list
+# responses stay at a constant query count
+USER_SELECT_RELATED = ()
+USER_PREFETCH_RELATED = ()
+
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -67,13 +89,21 @@ class UserViewSet(viewsets.ModelViewSet):
     authentication_classes = [JWTAuthentication]
     http_method_names = ["get", "put", "patch", "head", "options", "delete"]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if USER_SELECT_RELATED:
+            queryset = queryset.select_related(*USER_SELECT_RELATED)
+        if USER_PREFETCH_RELATED:
+            queryset = queryset.prefetch_related(*USER_PREFETCH_RELATED)
+        return queryset
+
     def get_permissions(self):
         if getattr(self, "swagger_fake_view", False):
             # VIEW USED FOR SCHEMA GENERATION PURPOSES
             return []
-        if self.action == "destroy":
-            self.permission_classes = [IsUserOwnerOrAdmin]
-        return super(UserViewSet, self).get_permissions()
+        # Plain lookup instead of mutating self.permission_classes per request
+        classes = USER_PERMS_BY_ACTION.get(self.action, self.permission_classes)
+        return [permission() for permission in classes]
 
     def create(self, request, *args, **kwargs):
         raise NotFound("This method is not available.")
@@ -84,13 +114,14 @@ class UserViewSet(viewsets.ModelViewSet):
             instance = self.get_object()
             serializer = self.get_serializer(instance, data=request.data, partial=True)
             serializer.is_valid(raise_exception=True)
-            self.perform_update(serializer)
 
+            # The serializer folds any uploaded picture into the same save,
+            # so the PATCH issues one UPDATE either way
+            save_kwargs = {}
             if "profile_picture" in request.FILES:
-                instance.profile_picture = handle_user_profile_picture_upload(
-                    instance, request.FILES["profile_picture"]
-                )
-                instance.save()
+                save_kwargs["profile_picture_file"] = request.FILES["profile_picture"]
+            serializer.save(**save_kwargs)
+
             return Response(serializer.data)
         except DatabaseError:
             return Response({"error": "Database error occurred"}, status=500)
@@ -131,17 +162,19 @@ class RegisterView(CreateAPIView):
             serializer.is_valid(raise_exception=True)
             self.perform_create(serializer)
 
-            # Send email
-            user = User.objects.get(email=request.data["email"])
-            email_response = send_email_sendgrid(user.username, user.otp, user.email)
-            if not email_response["success"]:
-                return Response(
-                    {
-                        "error": "OTP not sent",
-                        "message": email_response["message"],
-                    },
-                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
-                )
+            # perform_create already saved the user, so reuse the serializer
+            # instance instead of re-fetching the row
+            user = serializer.instance
+            otp = generate_otp()
+            OTPState.objects.create(
+                user=user,
+                otp=otp,
+                expires_at=timezone.now() + timedelta(minutes=10),
+            )
+            cache_otp(user.email, otp)
+
+            # Queue OTP email so the response does not wait on the provider
+            send_otp_email.delay(user.username, otp, user.email)
 
             return Response(
                 {"message": "Registration successful. Please verify your email."},
@@ -176,46 +209,120 @@ class VerifyEmail(APIView):
             email = serializer.validated_data["email"]
             otp = serializer.validated_data["otp"]
 
-            user = get_object_or_404(User, email=email)
+            # Fast path: OTP was mirrored into the cache when it was sent,
+            # so the common (especially wrong-guess) case never touches the
+            # database except to flip is_verified on success
+            cached_otp = cache.get(f"otp:{email}")
+            if cached_otp is not None:
+                attempts = cache.get(f"otp_attempts:{email}") or 0
+                if attempts >= OTP_MAX_ATTEMPTS:
+                    return Response(
+                        {
+                            "message": "Too many failed attempts. Please try again later."
+                        },
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+
+                if hmac.compare_digest(str(otp), str(cached_otp)):
+                    User.objects.filter(email=email, is_verified=False).update(
+                        is_verified=True
+                    )
+                    OTPState.objects.filter(user__email=email).delete()
+                    cache.delete_many([f"otp:{email}", f"otp_attempts:{email}"])
+                    return Response(
+                        {"message": "Email verified, please proceed to Login page"},
+                        status=status.HTTP_200_OK,
+                    )
+
+                try:
+                    cache.incr(f"otp_attempts:{email}")
+                except ValueError:
+                    cache.set(f"otp_attempts:{email}", 1, timeout=OTP_CACHE_TTL)
+                return Response(
+                    {"message": "Invalid OTP"}, status=status.HTTP_400_BAD_REQUEST
+                )
+
+            # Cache miss (cold cache or OTP sent before a deploy): fall back
+            # to the OTPState row, a narrow table keyed by user. values()
+            # gives us the columns this flow reads without hydrating a model
+            # instance
+            row = (
+                OTPState.objects.filter(user__email=email)
+                .values(
+                    "id",
+                    "user_id",
+                    "otp",
+                    "expires_at",
+                    "attempts",
+                    "attempts_started_at",
+                    "user__is_verified",
+                )
+                .first()
+            )
+            if row is None:
+                # No pending verification OTP: unknown user, already
+                # verified, or the OTP was consumed
+                user_row = (
+                    User.objects.filter(email=email).values("is_verified").first()
+                )
+                if user_row is None:
+                    return Response(
+                        {"message": "User with this email does not exist"},
+                        status=status.HTTP_404_NOT_FOUND,
+                    )
+                if user_row["is_verified"]:
+                    return Response(
+                        {"message": "Email already verified, please Login"},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+                return Response(
+                    {"message": "OTP has expired"}, status=status.HTTP_400_BAD_REQUEST
+                )
 
             # Check if OTP has expired
-            if timezone.now() > user.otp_expiration:
+            if timezone.now() > row["expires_at"]:
                 return Response(
                     {"message": "OTP has expired"}, status=status.HTTP_400_BAD_REQUEST
                 )
 
             # Check if OTP verification is blocked due to too many attempts
             if (
-                user.otp_attempts >= 3
-                and (timezone.now() - user.otp_attempts_timestamp).total_seconds() < 600
+                row["attempts"] >= OTP_MAX_ATTEMPTS
+                and (timezone.now() - row["attempts_started_at"]).total_seconds() < 600
             ):
                 return Response(
                     {"message": "Too many failed attempts. Please try again later."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            if user.is_verified:
+            if row["user__is_verified"]:
                 return Response(
                     {"message": "Email already verified, please Login"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            elif otp == int(user.otp):
-                user.is_verified = True
-                user.otp = None
-                user.otp_attempts = 0
-                user.otp_attempts_timestamp = None
-                user.save()
+            elif hmac.compare_digest(str(otp), str(row["otp"])):
+                # The is_verified filter makes a concurrent double-verify a
+                # no-op; the consumed OTP state is dropped outright
+                User.objects.filter(pk=row["user_id"], is_verified=False).update(
+                    is_verified=True
+                )
+                OTPState.objects.filter(pk=row["id"]).delete()
 
                 return Response(
                     {"message": "Email verified, please proceed to Login page"},
                     status=status.HTTP_200_OK,
                 )
             else:
-                user.otp_attempts += 1
-                if user.otp_attempts == 1:
-                    user.otp_attempts_timestamp = timezone.now()
-                user.save()
+                # Increment in the database with F() so concurrent wrong
+                # guesses cannot lose counts to a read-modify-write race
+                OTPState.objects.filter(pk=row["id"]).update(
+                    attempts=F("attempts") + 1,
+                    attempts_started_at=Case(
+                        When(attempts=0, then=Value(timezone.now())),
+                        default=F("attempts_started_at"),
+                    ),
+                )
                 return Response(
                     {"message": "Invalid OTP"}, status=status.HTTP_400_BAD_REQUEST
                 )
@@ -245,27 +352,43 @@ class ResendOTP(APIView):
             serializer = self.serializer_class(data=request.data)
             serializer.is_valid(raise_exception=True)
             email = serializer.validated_data["email"]
-            user = get_object_or_404(User, email=email)
+
+            # email is unique (indexed); fetch only the columns this flow
+            # reads or writes instead of the full row, and skip the
+            # exception machinery on the miss path
+            user = (
+                User.objects.only("id", "username", "email", "is_verified")
+                .filter(email=email)
+                .first()
+            )
+            if user is None:
+                return Response(
+                    {"message": "User with this email does not exist"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
 
             if user.is_verified:
                 return Response(
                     {"message": "Email already verified, please Login"},
                     status=status.HTTP_200_OK,
                 )
-            user.otp = generate_otp()
-            user.otp_created_at = timezone.now()
-            user.otp_expiration = timezone.now() + timedelta(minutes=10)
-            user.save()
 
-            email_response = send_email_sendgrid(user.username, user.otp, user.email)
-            if not email_response["success"]:
-                return Response(
-                    {
-                        "error": "OTP not sent",
-                        "message": email_response["message"],
-                    },
-                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
-                )
+            # Upsert the narrow OTP row instead of rewriting user columns
+            otp = generate_otp()
+            OTPState.objects.update_or_create(
+                user=user,
+                defaults={
+                    "otp": otp,
+                    "expires_at": timezone.now() + timedelta(minutes=10),
+                    "attempts": 0,
+                    "attempts_started_at": None,
+                },
+            )
+
+            cache_otp(user.email, otp)
+
+            # Queue OTP email so the response does not wait on the provider
+            send_otp_email.delay(user.username, otp, user.email)
 
             return Response(
                 {"message": "New OTP sent, please check your email."},
@@ -362,7 +485,7 @@ class PasswordReset(APIView):
                     {"error": "OTP has expired"}, status=status.HTTP_400_BAD_REQUEST
                 )
 
-            if otp == int(user.otp):
+            if hmac.compare_digest(str(otp), str(user.otp)):
                 user.set_password(new_password)
                 user.otp = None
                 user.otp_expiration = None
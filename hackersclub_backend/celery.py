@@ -0,0 +1,18 @@
+"""
+Celery config for hackersclub_backend project.
+
+It exposes the Celery application as a module-level variable named ``app``.
+
+For more information on this file, see
+https://docs.celeryq.dev/en/stable/django/first-steps-with-django.html
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hackersclub_backend.settings")
+
+app = Celery("hackersclub_backend")
+app.config_from_object("django.conf:settings", namespace="CELERY")
+app.autodiscover_tasks()
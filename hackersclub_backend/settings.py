@@ -115,6 +115,18 @@ SENDGRID_API_KEY = env("SENDGRID_API_KEY")
 SENDGRID_EMAIL_SOURCE = env("SENDGRID_EMAIL_SOURCE")
 SENDGRID_TEMPLATE_ID = env("SENDGRID_TEMPLATE_ID")
 
+# Cache configs (Redis in production; falls back to local memory when no
+# REDIS_CACHE_URL is configured)
+CACHES = {
+    "default": env.cache_url("REDIS_CACHE_URL", default="locmemcache://"),
+}
+
+# Celery configs
+CELERY_BROKER_URL = env("CELERY_BROKER_URL")
+CELERY_TASK_ACKS_LATE = True
+# SendGrid throttles per-second sends, so a small fixed worker pool is enough
+CELERY_WORKER_CONCURRENCY = 14
+
 # AWS configs
 AWS_ACCESS_KEY_ID = env("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = env("AWS_SECRET_ACCESS_KEY")